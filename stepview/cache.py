@@ -0,0 +1,77 @@
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable
+
+CACHE_DIR = Path(
+    os.environ.get("STEPVIEW_CACHE_DIR", Path.home() / ".cache" / "stepview")
+)
+CACHE_PATH = CACHE_DIR / "cache.sqlite"
+# older sqlite versions do not accept more than 999 variables in a query.
+MAX_SQLITE_VARIABLES = 999
+SQLITE_TIMEOUT = 30
+# part of every key, bump it when the cached values change so that a new
+# version of stepview does not read what an older one wrote.
+CACHE_VERSION = 3
+
+
+def make_key(*parts) -> str:
+    """Create a stable cache key out of the parts."""
+    return hashlib.blake2b(
+        "|".join(map(str, (CACHE_VERSION, *parts))).encode()
+    ).hexdigest()
+
+
+class Cache:
+    """Store of floats on disk where every value expires after a ttl.
+
+    We open a connection per call so that the cache can be used from the
+    threads that run the profiles.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS metrics "
+                "(key TEXT PRIMARY KEY, value REAL, expires_at REAL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(str(self.path), timeout=SQLITE_TIMEOUT)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get_many(self, keys: Iterable[str]) -> dict:
+        """Return the values of the keys that are cached and not expired."""
+        keys = list(keys)
+        values = {}
+        with self._connect() as connection:
+            for i in range(0, len(keys), MAX_SQLITE_VARIABLES):
+                keys_ = keys[i : i + MAX_SQLITE_VARIABLES]
+                rows = connection.execute(
+                    f"SELECT key, value FROM metrics WHERE expires_at > ? "
+                    f"AND key IN ({', '.join('?' * len(keys_))})",
+                    (time.time(), *keys_),
+                )
+                values.update(rows)
+        return values
+
+    def set_many(self, items: dict, ttl: int):
+        """Store the items for ttl seconds and drop everything that
+        expired."""
+        now = time.time()
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO metrics (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, float(value), now + ttl) for key, value in items.items()],
+            )
+            connection.execute("DELETE FROM metrics WHERE expires_at <= ?", (now,))
@@ -1,8 +1,18 @@
+import functools
+import sqlite3
+import threading
 from collections import defaultdict
+from collections import namedtuple
+from concurrent.futures import Executor
 from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 from dataclasses import dataclass
+from itertools import product
+from operator import attrgetter
+from typing import Callable
 from typing import List
 from typing import Optional
+from typing import Union
 
 import boto3
 import botocore.client
@@ -13,17 +23,32 @@ from rich.progress import TextColumn
 from rich.table import Table
 
 from stepview import logger
+from stepview.cache import Cache
+from stepview.cache import make_key
 
 
 @dataclass
 class State:
     """State that we pass to the TUI table."""
 
+    # we keep a State and a Row per statemachine, slots save us a __dict__
+    # per instance. (dataclass(slots=True) needs python 3.10)
+    __slots__ = (
+        "total_executions",
+        "succeeded",
+        "succeeded_perc",
+        "failed",
+        "running",
+        "aborted",
+        "timed_out",
+        "throttled",
+    )
+
     total_executions: int
     succeeded: str
     succeeded_perc: str
     failed: str
-    running: str
+    running: Union[int, str]
     aborted: str
     timed_out: str
     throttled: str
@@ -31,6 +56,16 @@ class State:
 
 @dataclass
 class Row:
+    __slots__ = (
+        "state_machine_name",
+        "state_machine_name_with_url",
+        "profile_name",
+        "account",
+        "region",
+        "state",
+        "_values",
+    )
+
     state_machine_name: str
     state_machine_name_with_url: str
     profile_name: str
@@ -38,33 +73,54 @@ class Row:
     region: str
     state: State
 
-    def get_values(self):
-        return (
+    def __post_init__(self):
+        # format the values once, the table can ask for them many times.
+        state = self.state
+        self._values = (
             self.state_machine_name_with_url,
             self.profile_name,
             self.account,
             self.region,
-            f"{self.state.total_executions:,.0f}",
-            f"{self.state.succeeded_perc:,.2f}",
-            f"{self.state.running}",
-            f"{self.state.failed:,.0f}/"
-            f"{self.state.aborted:,.0f}/"
-            f"{self.state.timed_out:,.0f}/"
-            f"{self.state.throttled:,.0f}",
+            f"{state.total_executions:,.0f}",
+            f"{state.succeeded_perc:,.2f}",
+            f"{state.running}",
+            f"{state.failed:,.0f}/{state.aborted:,.0f}/"
+            f"{state.timed_out:,.0f}/{state.throttled:,.0f}",
         )
 
+    def get_values(self):
+        return self._values
+
+
+ArnParts = namedtuple("ArnParts", "account region resource")
+
 
 @dataclass
 class Periods:
     """We use Periods class to get the datetime range for collecting the
     metrics."""
 
+    __slots__ = (
+        "start_date_of_period",
+        "now",
+        "granularity",
+        "name",
+        "_difference_in_seconds",
+    )
+
     start_date_of_period: pendulum.DateTime
     now: pendulum.DateTime
     granularity: str
+    name: str
+
+    def __post_init__(self):
+        # the period is the same for every metric query, compute it once.
+        self._difference_in_seconds = (
+            self.now - self.start_date_of_period
+        ).in_seconds()
 
     def get_difference_in_seconds(self):
-        return (self.now - self.start_date_of_period).in_seconds()
+        return self._difference_in_seconds
 
 
 class MetricNames:
@@ -95,23 +151,67 @@ class Time:
 
     @classmethod
     def get_time_variables(cls):
-        return [
-            v
-            for k, v in cls.__dict__.items()
-            if not k.startswith("__")
-            and not k.endswith("__")
-            and not "method" in str(v)
-            and not "function" in str(v)
-        ]
+        return TIME_VARIABLES
+
 
+TIME_VARIABLES = (
+    Time.MINUTE,
+    Time.HOUR,
+    Time.TODAY,
+    Time.DAY,
+    Time.WEEK,
+    Time.MONTH,
+    Time.YEAR,
+)
+
+
+METRICS = (
+    MetricNames.EXECUTIONS_STARTED,
+    MetricNames.EXECUTIONS_SUCCEEDED,
+    MetricNames.EXECUTIONS_FAILED,
+    MetricNames.EXECUTIONS_ABORTED,
+    MetricNames.EXECUTIONS_TIMED_OUT,
+    MetricNames.EXECUTION_THROTTLED,
+)
 
 NOW = pendulum.now()
-MAX_POOL_CONNECTIONS = 10
+# number of concurrent requests per client, and the size of its connection pool.
+MAX_POOL_CONNECTIONS = 32
 MAX_RUNNING_RESULTS = 3
 MAX_RETRIES = 10
-
-
-def main(aws_profiles: List[str], period: str, tags: Optional[List[tuple]]) -> tuple:
+# adaptive retries rate limit the client side when aws starts to throttle,
+# instead of failing with a ThrottlingException.
+CONFIG = botocore.client.Config(
+    retries={"max_attempts": MAX_RETRIES, "mode": "adaptive"},
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+)
+# maximum number of resources in a single GetResources call.
+MAX_TAGGING_RESULTS = 100
+# maximum number of statemachines in a single ListStateMachines call.
+MAX_STATE_MACHINE_RESULTS = 1000
+# maximum number of metric data queries in a single GetMetricData call.
+MAX_METRIC_DATA_QUERIES = 500
+MAX_STATE_MACHINES_PER_METRIC_DATA_CALL = MAX_METRIC_DATA_QUERIES // len(METRICS)
+# number of seconds we keep the metrics of a period in the cache. The end of a
+# period is aligned on a grid of a minute or an hour (see build_periods_mapping),
+# once it moves to the next step of the grid the cache keys change anyway.
+CACHE_TTL = {
+    Time.MINUTE: 60,
+    Time.HOUR: 60,
+    Time.TODAY: 60,
+    Time.DAY: 60,
+    Time.WEEK: 3600,
+    Time.MONTH: 3600,
+    Time.YEAR: 3600,
+}
+
+
+def main(
+    aws_profiles: List[str],
+    period: str,
+    tags: Optional[List[tuple]],
+    use_cache: bool = True,
+) -> tuple:
     """Main function that fetches stepfunctions data, and returns a "rich"
     table.
 
@@ -120,19 +220,31 @@ def main(aws_profiles: List[str], period: str, tags: Optional[List[tuple]]) -> t
     aws_profiles: List of aws profiles located at ~/.aws/credentials
     period: An Attribute of Time class.
     tags: Key-value pairs of tags that we use to filter the stepfunctions
+    use_cache: Reuse the metrics we cached on disk during previous runs.
 
     Returns
     -------
         (Rich.Table, List of all rows for testing purposes)
     """
     period = get_period_objects(period=period)
+    cache = get_cache() if use_cache else None
     progress_viz = (TextColumn("[progress.description]{task.description}"), BarColumn())
 
-    with Progress(*progress_viz) as progress:
-        progress.add_task("[green]Getting Data...", start=False)
+    # 1 pool for the statemachine requests of all profiles, so that we run at
+    # most MAX_POOL_CONNECTIONS of them at the same time.
+    with Progress(*progress_viz) as progress, ThreadPoolExecutor(
+        MAX_POOL_CONNECTIONS
+    ) as executor:
+        task = progress.add_task("[green]Getting Data...", total=len(aws_profiles))
+        profile_results = []
         try:
-            profile_generator = run_all_profiles(
-                aws_profiles=aws_profiles, period=period, tags=tags
+            profile_results = run_all_profiles(
+                aws_profiles=aws_profiles,
+                period=period,
+                tags=tags,
+                cache=cache,
+                executor=executor,
+                on_profile_done=lambda: progress.advance(task),
             )
         except botocore.client.ClientError as e:
             if e.response["Error"]["Code"] == "ThrottlingException":
@@ -154,7 +266,7 @@ def main(aws_profiles: List[str], period: str, tags: Optional[List[tuple]]) -> t
     table.add_column("Failed/Aborted/TimedOut/Throttled", overflow="fold")
 
     all_rows = []
-    for profile in profile_generator:
+    for profile in profile_results:
         for row in profile:
             if row:
                 table.add_row(*row.get_values())
@@ -163,85 +275,186 @@ def main(aws_profiles: List[str], period: str, tags: Optional[List[tuple]]) -> t
     return table, all_rows
 
 
+def get_cache() -> Optional[Cache]:
+    """Open the cache on disk, caching is optional so if we cannot open it
+    we run without."""
+    try:
+        return Cache()
+    except (OSError, sqlite3.Error) as e:
+        logger.info(f"Cannot open the cache, we continue without it: {e}")
+        return None
+
+
 def run_all_profiles(
-    aws_profiles: List[str], period: Periods, tags=Optional[List[tuple]]
+    aws_profiles: List[str],
+    period: Periods,
+    tags=Optional[List[tuple]],
+    cache: Optional[Cache] = None,
+    executor: Optional[Executor] = None,
+    on_profile_done: Optional[Callable[[], None]] = None,
 ):
-    """Run all profiles concurrently."""
+    """Run all profiles concurrently.
+
+    on_profile_done is called every time a profile finishes, in the
+    order they finish. The results are returned in the order of
+    aws_profiles.
+    """
 
     def _run_for_profile(aws_profile: str):
-        return run_for_profile(profile_name=aws_profile, period=period, tags=tags)
+        return run_for_profile(
+            profile_name=aws_profile,
+            period=period,
+            tags=tags,
+            cache=cache,
+            executor=executor,
+        )
 
     with ThreadPoolExecutor(len(aws_profiles)) as thread:
-        profile_generator = thread.map(_run_for_profile, aws_profiles)
+        futures = [thread.submit(_run_for_profile, p) for p in aws_profiles]
+        for _ in as_completed(futures):
+            if on_profile_done is not None:
+                on_profile_done()
+
+    return [future.result() for future in futures]
+
 
-    return profile_generator
+_session_locks = defaultdict(threading.Lock)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_session(profile_name: str) -> boto3.Session:
+    """Create the boto3 session of a profile and resolve its credentials
+    once.
+
+    Resolving credentials can mean calling an external process
+    (credential_process, aws-vault, sso, ...) which is slow and
+    serializes on a file lock. Only called from _get_clients, under the
+    lock of the profile.
+    """
+    session = boto3.Session(profile_name=profile_name)
+    session.get_credentials()
+    return session
+
+
+def get_clients(profile_name: str) -> tuple:
+    """Return the stepfunctions, cloudwatch and resourcegroupstaggingapi
+    clients of a profile, all from the same session and config.
+
+    Building a client loads the service model and resolves the endpoint,
+    so we do it once per profile. boto3 clients are thread safe, but
+    creating them from the same session is not, hence the lock.
+    """
+    with _session_locks[profile_name]:
+        return _get_clients(profile_name)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_clients(profile_name: str) -> tuple:
+    session = _get_session(profile_name)
+    return (
+        session.client("stepfunctions", config=CONFIG),
+        session.client("cloudwatch", config=CONFIG),
+        session.client("resourcegroupstaggingapi", config=CONFIG),
+    )
 
 
 def run_for_profile(
-    profile_name: str, period: Periods, tags: Optional[List[tuple]]
+    profile_name: str,
+    period: Periods,
+    tags: Optional[List[tuple]],
+    cache: Optional[Cache] = None,
+    executor: Optional[Executor] = None,
 ) -> list:
-    """For each profile fetch all statemachine results."""
-    config = botocore.client.Config(
-        retries={"max_attempts": MAX_RETRIES, "mode": "standard"},
-        max_pool_connections=MAX_POOL_CONNECTIONS,
-    )
-    sfn_client = boto3.Session(profile_name=profile_name).client(
-        "stepfunctions", config=config
-    )
-    cloudwatch_resource = boto3.Session(profile_name=profile_name).resource(
-        "cloudwatch", config=config
-    )
-    tags_client = boto3.Session(profile_name=profile_name).client(
-        "resourcegroupstaggingapi", config=config
-    )
-    all_statemachine_results = []
-    for state_machines in get_statemachines(tags_client=tags_client, tags=tags):
-        if state_machines:
+    """For each profile fetch all statemachine results.
 
-            def _run_for_state_machine(state_machine_arn):
-                return run_for_state_machine(
-                    state_machine_arn=state_machine_arn,
-                    cloudwatch_resource=cloudwatch_resource,
-                    sfn_client=sfn_client,
-                    profile_name=profile_name,
-                    period=period,
-                )
+    The requests per statemachine run on the executor, which can be
+    shared with other profiles. If a cache is provided, we reuse the
+    cloudwatch metrics of a previous run. The running executions are
+    always fetched from aws, they change all the time.
+    """
+    if executor is None:
+        with ThreadPoolExecutor(MAX_POOL_CONNECTIONS) as executor:
+            return run_for_profile(
+                profile_name=profile_name,
+                period=period,
+                tags=tags,
+                cache=cache,
+                executor=executor,
+            )
+
+    sfn_client, cloudwatch_client, tags_client = get_clients(profile_name)
+
+    def _submit_batch_get_metric_data(state_machine_arns):
+        return executor.submit(
+            batch_get_metric_data,
+            cloudwatch_client=cloudwatch_client,
+            state_machine_arns=state_machine_arns,
+            period=period,
+            cache=cache,
+        )
 
-            with ThreadPoolExecutor(
-                min(len(state_machines), MAX_POOL_CONNECTIONS)
-            ) as thread:
-                state_machine_results = thread.map(
-                    _run_for_state_machine, state_machines
+    # we don't wait for all pages of statemachines. As soon as we have enough
+    # statemachines for a GetMetricData call we fetch their metrics, and we
+    # look up the running executions of every statemachine right away. This
+    # way the connections to cloudwatch and stepfunctions are set up while we
+    # are still paging.
+    running_futures = {}
+    metrics_futures = []
+    state_machine_arns = []
+    for state_machines in get_statemachines(
+        sfn_client=sfn_client, tags_client=tags_client, tags=tags
+    ):
+        for state_machine_arn in state_machines:
+            running_futures[state_machine_arn] = executor.submit(
+                get_running_executions_for_state_machine,
+                sfn_client=sfn_client,
+                state_machine_arn=state_machine_arn,
+            )
+            state_machine_arns.append(state_machine_arn)
+            if len(state_machine_arns) == MAX_STATE_MACHINES_PER_METRIC_DATA_CALL:
+                metrics_futures.append(
+                    _submit_batch_get_metric_data(state_machine_arns)
                 )
-            all_statemachine_results.extend(state_machine_results)
-        else:
-            logger.info(f"no statemachines found for profile {profile_name}")
-    all_statemachine_results_ = {
-        row.state_machine_name: row for row in all_statemachine_results
-    }
-    all_statemachine_results_sorted = list(
-        dict(sorted(all_statemachine_results_.items())).values()
-    )
-    return all_statemachine_results_sorted
+                state_machine_arns = []
+    if state_machine_arns:
+        metrics_futures.append(_submit_batch_get_metric_data(state_machine_arns))
+    if not running_futures:
+        logger.info(f"no statemachines found for profile {profile_name}")
+        return []
+
+    all_metrics = {}
+    for metrics_future in metrics_futures:
+        all_metrics.update(metrics_future.result())
+
+    all_statemachine_results = []
+    for state_machine_arn, running_future in running_futures.items():
+        try:
+            running = running_future.result()
+        except sfn_client.exceptions.StateMachineDoesNotExist:
+            # the statemachine was deleted after we listed it, or the tagging
+            # api still returns a deleted statemachine.
+            logger.info(f"statemachine {state_machine_arn} does not exist anymore")
+            continue
+        all_statemachine_results.append(
+            run_for_state_machine(
+                state_machine_arn=state_machine_arn,
+                metrics=all_metrics[state_machine_arn],
+                running=running,
+                profile_name=profile_name,
+            )
+        )
+    # statemachine names are unique within a profile, we only need to sort.
+    return sorted(all_statemachine_results, key=attrgetter("state_machine_name"))
 
 
 def run_for_state_machine(
     state_machine_arn: str,
-    cloudwatch_resource: object,
-    sfn_client: object,
+    metrics: dict,
+    running: Union[int, str],
     profile_name: str,
-    period: Periods,
 ):
-    state = get_sfn_data(
-        cloudwatch_resource=cloudwatch_resource,
-        sfn_client=sfn_client,
-        state_machine_arn=state_machine_arn,
-        period=period,
-    )
-    arn_parsed = parse_aws_arn(state_machine_arn)
-    account = arn_parsed.get("account")
-    region = arn_parsed.get("region")
-    state_machine_name = arn_parsed.get("resource")
+    state = get_sfn_data(metrics=metrics, running=running)
+    account, region, state_machine_name = parse_aws_arn(state_machine_arn)
     state_machine_url = get_statemachine_url(
         state_machine_arn=state_machine_arn, region=region
     )
@@ -259,9 +472,19 @@ def run_for_state_machine(
     return row
 
 
-def get_statemachines(tags_client: object, tags: Optional[List[tuple]]) -> list:
+def get_statemachines(
+    sfn_client: object, tags_client: object, tags: Optional[List[tuple]]
+) -> list:
     """Return a list of statemachine arns for a set of tags, if they are
-    provided."""
+    provided.
+
+    The resourcegroupstaggingapi only knows resources that are or were
+    tagged, so without tags we list the statemachines with the
+    stepfunctions client.
+    """
+    if not tags:
+        yield from get_all_statemachines(sfn_client=sfn_client)
+        return
     tags_filters = parse_tags(tags=tags)
     for statemachines in get_statemachines_for_tags(
         tags_client=tags_client, tags_filters=tags_filters
@@ -273,6 +496,18 @@ def get_statemachines(tags_client: object, tags: Optional[List[tuple]]) -> list:
             logger.info(f"No statemachines were found for tags: {tags}")
 
 
+def get_all_statemachines(sfn_client: object) -> list:
+    """Use a boto3 stepfunctions client to fetch the arns of all
+    statemachines, page by page."""
+    sfn_paginator = sfn_client.get_paginator("list_state_machines")
+    for page in sfn_paginator.paginate(
+        PaginationConfig={"PageSize": MAX_STATE_MACHINE_RESULTS}
+    ):
+        state_machines = page.get("stateMachines")
+        if state_machines:
+            yield [state_machine["stateMachineArn"] for state_machine in state_machines]
+
+
 def parse_tags(tags: Optional[List[tuple]]):
     """Parse the tags so that they can be handled by the boto3
     resourcegroupstaggingapi client."""
@@ -285,8 +520,7 @@ def parse_tags(tags: Optional[List[tuple]]):
 
 def get_statemachines_for_tags(tags_client: object, tags_filters: list) -> list:
     """Use a boto3 resourcegroupstaggingapi client to fetch all statemachine
-    arns that comply with the tags if  they are defined. If the tags are not
-    defined fetch all statemachines.
+    arns that comply with the tags.
 
     Parameters
     ----------
@@ -298,74 +532,124 @@ def get_statemachines_for_tags(tags_client: object, tags_filters: list) -> list:
     """
     tagging_paginator = tags_client.get_paginator("get_resources")
     for page_for_tags in tagging_paginator.paginate(
-        ResourceTypeFilters=["states:stateMachine"], TagFilters=tags_filters
+        ResourceTypeFilters=["states:stateMachine"],
+        TagFilters=tags_filters,
+        PaginationConfig={"PageSize": MAX_TAGGING_RESULTS},
     ):
         yield page_for_tags.get("ResourceTagMappingList")
 
 
-def call_metric_endpoint(
-    metric_name: str,
-    cloudwatch_resource: object,
-    state_machine_arn: str,
-    period_object: Periods,
-):
-    """Call cloudwatch metric endpoint to get statemachine data.
+def batch_get_metric_data(
+    cloudwatch_client: object,
+    state_machine_arns: List[str],
+    period: Periods,
+    cache: Optional[Cache] = None,
+) -> dict:
+    """Call cloudwatch GetMetricData to get the metrics of all statemachines at
+    once. A single call accepts up to MAX_METRIC_DATA_QUERIES queries, so we
+    need ⌈len(state_machine_arns) * len(METRICS) / 500⌉ calls.
 
-    https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/cloudwatch.html#metric
+    https://docs.aws.amazon.com/AmazonCloudWatch/latest/APIReference/API_GetMetricData.html
     https://docs.aws.amazon.com/step-functions/latest/dg/procedure-cw-metrics.html
-    """
-    metric = cloudwatch_resource.Metric("AWS/States", metric_name).get_statistics(
-        Dimensions=[
-            {
-                "Name": "StateMachineArn",
-                "Value": state_machine_arn,
-            },
-        ],
-        StartTime=period_object.start_date_of_period,
-        EndTime=period_object.now,
-        Period=period_object.get_difference_in_seconds(),
-        Statistics=[
-            "Sum",
-        ],
-    )
-    sum_of_datapoints = sum([datapoint["Sum"] for datapoint in metric["Datapoints"]])
-    return sum_of_datapoints
 
+    Parameters
+    ----------
+    cloudwatch_client: boto3 cloudwatch client.
+    state_machine_arns: arns of the statemachines we want the metrics for.
+    period: Periods object that defines the time range.
+    cache: If provided, we only request the metrics that are not cached yet.
 
-def get_sfn_data(
-    cloudwatch_resource: object,
-    sfn_client: object,
-    state_machine_arn: str,
-    period: Periods,
-) -> State:
-    """get statemachine data from cloudwatch (All except the ones in state
-    running) and from stepfunctions API (all in state running)."""
-
-    def _call_metric_endpoint(metric_name):
-        return call_metric_endpoint(
-            metric_name=metric_name,
-            cloudwatch_resource=cloudwatch_resource,
-            state_machine_arn=state_machine_arn,
-            period_object=period,
-        )
-
-    metrics = [
-        "ExecutionsStarted",
-        "ExecutionsSucceeded",
-        "ExecutionsFailed",
-        "ExecutionsAborted",
-        "ExecutionsTimedOut",
-        "ExecutionThrottled",
+    Returns
+    -------
+        {state_machine_arn: {metric_name: sum of datapoints}}
+    """
+    metrics = {arn: dict.fromkeys(METRICS, 0) for arn in state_machine_arns}
+    arns_and_metrics = list(product(state_machine_arns, METRICS))
+    if cache is not None:
+        keys = {
+            (arn, metric_name): make_key(
+                arn, metric_name, period.start_date_of_period, period.now
+            )
+            for arn, metric_name in arns_and_metrics
+        }
+        try:
+            cached_metrics = cache.get_many(keys.values())
+        except sqlite3.Error as e:
+            # for example when another stepview run locks the database.
+            logger.info(f"Cannot read the cache, we fetch the metrics: {e}")
+            cached_metrics = {}
+        arns_and_metrics = []
+        for (arn, metric_name), key in keys.items():
+            if key in cached_metrics:
+                metrics[arn][metric_name] = cached_metrics[key]
+            else:
+                arns_and_metrics.append((arn, metric_name))
+        if not arns_and_metrics:
+            return metrics
+
+    # the metrics of a statemachine share the same dimensions.
+    dimensions = {
+        state_machine_arn: [{"Name": "StateMachineArn", "Value": state_machine_arn}]
+        for state_machine_arn in state_machine_arns
+    }
+    period_in_seconds = period.get_difference_in_seconds()
+    # the index of a query in this list is used as its id, so that we can
+    # map the results back to the statemachine and the metric.
+    metric_data_queries = [
+        {
+            "Id": f"m{i}",
+            "MetricStat": {
+                "Metric": {
+                    "Namespace": "AWS/States",
+                    "MetricName": metric_name,
+                    "Dimensions": dimensions[state_machine_arn],
+                },
+                "Period": period_in_seconds,
+                "Stat": "Sum",
+            },
+        }
+        for i, (state_machine_arn, metric_name) in enumerate(arns_and_metrics)
     ]
 
-    with ThreadPoolExecutor(len(metrics)) as thread:
-        started, succeeded, failed, aborted, timed_out, throttled = list(
-            thread.map(_call_metric_endpoint, metrics)
-        )
+    # only the metrics that cloudwatch could fully compute are cached.
+    complete = set()
+    paginator = cloudwatch_client.get_paginator("get_metric_data")
+    for i in range(0, len(metric_data_queries), MAX_METRIC_DATA_QUERIES):
+        for page in paginator.paginate(
+            MetricDataQueries=metric_data_queries[i : i + MAX_METRIC_DATA_QUERIES],
+            StartTime=period.start_date_of_period,
+            EndTime=period.now,
+        ):
+            for result in page["MetricDataResults"]:
+                arn_and_metric = arns_and_metrics[int(result["Id"][1:])]
+                state_machine_arn, metric_name = arn_and_metric
+                metrics[state_machine_arn][metric_name] += sum(result["Values"])
+                # a result that spans multiple pages is PartialData until
+                # its last page.
+                if result.get("StatusCode") == "Complete":
+                    complete.add(arn_and_metric)
+                else:
+                    complete.discard(arn_and_metric)
+
+    if cache is not None and complete:
+        try:
+            cache.set_many(
+                {
+                    keys[(arn, metric_name)]: metrics[arn][metric_name]
+                    for arn, metric_name in complete
+                },
+                ttl=CACHE_TTL[period.name],
+            )
+        except sqlite3.Error as e:
+            logger.info(f"Cannot write the cache: {e}")
+    return metrics
 
-    running = get_running_executions_for_state_machine(
-        sfn_client=sfn_client, state_machine_arn=state_machine_arn
-    )
+
+def get_sfn_data(metrics: dict, running: Union[int, str]) -> State:
+    """combine statemachine data from cloudwatch metrics (All except the ones
+    in state running) and from stepfunctions API (all in state running)."""
+    started = metrics[MetricNames.EXECUTIONS_STARTED]
+    succeeded = metrics[MetricNames.EXECUTIONS_SUCCEEDED]
 
     succeeded_perc = (succeeded / started) * 100 if started > 0 else 0
 
@@ -373,66 +657,76 @@ def get_sfn_data(
         total_executions=started,
         succeeded=succeeded,
         succeeded_perc=succeeded_perc,
-        failed=failed,
+        failed=metrics[MetricNames.EXECUTIONS_FAILED],
         running=running,
-        aborted=aborted,
-        timed_out=timed_out,
-        throttled=throttled,
+        aborted=metrics[MetricNames.EXECUTIONS_ABORTED],
+        timed_out=metrics[MetricNames.EXECUTIONS_TIMED_OUT],
+        throttled=metrics[MetricNames.EXECUTION_THROTTLED],
     )
 
 
-def get_period_objects(period: str):
-    periods_mapping = {
-        Time.MINUTE: Periods(NOW.subtract(minutes=1), NOW, "microseconds"),
-        Time.HOUR: Periods(NOW.subtract(hours=1), NOW, "seconds"),
-        Time.TODAY: Periods(NOW.start_of("day"), NOW, "seconds"),
-        Time.DAY: Periods(NOW.subtract(days=1), NOW, "seconds"),
-        Time.WEEK: Periods(NOW.subtract(weeks=1), NOW, "hours"),
-        Time.MONTH: Periods(NOW.subtract(months=1), NOW, "hours"),
-        Time.YEAR: Periods(NOW.subtract(years=1), NOW, "hours"),
+def build_periods_mapping(now: pendulum.DateTime) -> dict:
+    """Build the Periods object of every Time period, ending at now."""
+    # align the end of the periods on a grid, so that successive runs
+    # query the same time range and can reuse the cached metrics.
+    minute = now.start_of("minute")
+    hour = now.start_of("hour")
+    return {
+        Time.MINUTE: Periods(
+            minute.subtract(minutes=1), minute, "microseconds", Time.MINUTE
+        ),
+        Time.HOUR: Periods(minute.subtract(hours=1), minute, "seconds", Time.HOUR),
+        Time.TODAY: Periods(now.start_of("day"), minute, "seconds", Time.TODAY),
+        Time.DAY: Periods(minute.subtract(days=1), minute, "seconds", Time.DAY),
+        Time.WEEK: Periods(hour.subtract(weeks=1), hour, "hours", Time.WEEK),
+        Time.MONTH: Periods(hour.subtract(months=1), hour, "hours", Time.MONTH),
+        Time.YEAR: Periods(hour.subtract(years=1), hour, "hours", Time.YEAR),
     }
 
+
+def get_period_objects(period: str):
     try:
-        period_object = periods_mapping[period]
+        period_object = PERIODS_MAPPING[period]
     except KeyError as e:
         raise NameError(
-            f"We did not recognize the value {period}. Please choose from {periods_mapping.keys()}"
+            f"We did not recognize the value {period}. Please choose from {PERIODS_MAPPING.keys()}"
         )
     return period_object
 
 
+# the periods are computed once, relative to the time stepview started.
+PERIODS_MAPPING = build_periods_mapping(NOW)
+
+
+@functools.lru_cache(maxsize=4096)
 def get_statemachine_url(state_machine_arn: str, region: str) -> str:
     return f"https://console.aws.amazon.com/states/home?region={region}#/statemachines/view/{state_machine_arn}"
 
 
-def parse_aws_arn(arn):
-    """parse arn into its logical pieces https://gist.github.com/gene1wood/5299
+@functools.lru_cache(maxsize=4096)
+def parse_aws_arn(arn: str) -> ArnParts:
+    """parse arn into the pieces we use https://gist.github.com/gene1wood/5299
     969edc4ef21d8efcfea52158dd40?permalink_comment_id=2351697#gistcomment-23516
     97.
 
     :param arn: full aws arn
-    :return:
+    :return: ArnParts with the account, region and resource name.
     """
-    elements = arn.split(":", 5)
-    result = {
-        "arn": elements[0],
-        "partition": elements[1],
-        "service": elements[2],
-        "region": elements[3],
-        "account": elements[4],
-        "resource": elements[5],
-        "resource_type": None,
-    }
-    if "/" in result["resource"]:
-        result["resource_type"], result["resource"] = result["resource"].split("/", 1)
-    elif ":" in result["resource"]:
-        result["resource_type"], result["resource"] = result["resource"].split(":", 1)
-    return result
+    _, _, _, region, account, resource = arn.split(":", 5)
+    # the resource is either "type/name", "type:name" or just "name".
+    _, sep, name = resource.partition("/")
+    if not sep:
+        _, sep, name = resource.partition(":")
+    if sep:
+        resource = name
+    return ArnParts(account=account, region=region, resource=resource)
 
 
 def get_running_executions_for_state_machine(
     sfn_client: object, state_machine_arn: str
-) -> str:
+) -> Union[int, str]:
+    """Return the number of running executions, or ">=MAX_RUNNING_RESULTS"
+    when there are at least as many as we ask for."""
     executions = sfn_client.list_executions(
         stateMachineArn=state_machine_arn,
         statusFilter="RUNNING",
@@ -3,14 +3,12 @@ import warnings
 from typing import List
 
 import typer
-from rich import traceback
 from rich.console import Console
 
 from stepview import logger
 from stepview import set_logger_3rd_party_lib
 from stepview.data import main
 from stepview.data import Time
-from stepview.tui import StepViewTUI
 
 warnings.simplefilter("ignore", ResourceWarning)
 
@@ -58,6 +56,11 @@ def stepview(
     verbose: bool = typer.Option(
         False, "--verbose", help="Use --verbose to set verbose logging."
     ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Use --no-cache to ignore cached results and fetch everything from AWS.",
+    ),
 ):
     _tags = []
     if tags is not None:
@@ -68,7 +71,9 @@ def stepview(
     if verbose:
         set_logger_3rd_party_lib(logging_level=logging.DEBUG)
     try:
-        table, _ = main(aws_profiles=profile, period=period, tags=_tags)
+        table, _ = main(
+            aws_profiles=profile, period=period, tags=_tags, use_cache=not no_cache
+        )
     except Exception as e:
         console.print_exception()
         console.log("Woops something went wrong.")
@@ -82,6 +87,9 @@ def stepview(
         )
         console.log("")
     else:
+        # textual is only needed to show the table, import it when we get here.
+        from stepview.tui import StepViewTUI
+
         StepViewTUI.run(
             title=f"STEPVIEW (period: {period}, tags: {', '.join(tags)})", table=table
         )
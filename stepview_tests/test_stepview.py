@@ -1,99 +1,81 @@
 import datetime
 import os
+import sqlite3
+import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import MagicMock
 from unittest.mock import patch
 
-import boto3
+import botocore.exceptions
 import pendulum
 from freezegun import freeze_time
 from moto import mock_cloudwatch
 from moto import mock_stepfunctions
-from textual.app import App
 from typer.testing import CliRunner
 
 import stepview.data
 from stepview import entrypoint
+from stepview.cache import Cache
+from stepview.cache import make_key
+from stepview.data import MAX_METRIC_DATA_QUERIES
+from stepview.data import METRICS
 from stepview.data import MetricNames
 from stepview.data import NOW
 from stepview.data import Time
 
 current_dir = Path(__file__).resolve().parent
-#
-#
-# def list_executions(status: list, start_date=datetime.datetime.now(tz=tzutc())):
-#     """example.
-#
-#         [{
-#              'executionArn': 'arn:aws:states:eu-west-1:123456789012:execution:sm1:586ae65c-05fa-47ff-a45e-f3efea9f551a',
-#              'stateMachineArn': 'arn:aws:states:eu-west-1:123456789012:stateMachine:sm1',
-#              'name': '586ae65c-05fa-47ff-a45e-f3efea9f551a', 'status': 'RUNNING',
-#              'startDate': datetime.datetime(2022, 4, 6, 10, 49, 51, 278000, tzinfo=tzutc())}, {
-#              'executionArn': 'arn:aws:states:eu-west-1:123456789012:execution:sm1:5a89bab9-7276-4df0-ab70-ac3e4375f6d6',
-#              'stateMachineArn': 'arn:aws:states:eu-west-1:123456789012:stateMachine:sm1',
-#              'name': '5a89bab9-7276-4df0-ab70-ac3e4375f6d6', 'status': 'RUNNING',
-#              'startDate': datetime.datetime(2022, 4, 6, 10, 49, 41, 459000, tzinfo=tzutc())
-#         }]
-#
-#
-#
-#     :param status: 'RUNNING'|'SUCCEEDED'|'FAILED'|'TIMED_OUT'|'ABORTED'
-#     :return:
-#     """
-#     return {
-#         "executions": [
-#             {
-#                 "executionArn": "arn:aws:states:eu-west-1:123456789012:execution:sm1:586ae65c-05fa-47ff-a45e-f3efea9f551a",
-#                 "stateMachineArn": "arn:aws:states:eu-west-1:123456789012:stateMachine:sm1",
-#                 "name": "586ae65c-05fa-47ff-a45e-f3efea9f551a",
-#                 "status": s,
-#                 "startDate": start_date,
-#             }
-#             for s in status
-#         ]
-#     }
-#
+# our dummy statemachine definition, read once for all tests.
+SFN_DEFINITION = Path(current_dir, "resources", "sfn_definition.json").read_text()
+# point boto3 to our local credentials file using an env var, once for all
+# tests. We overwrite it so that the tests never use real credentials.
+os.environ["AWS_SHARED_CREDENTIALS_FILE"] = str(
+    Path(current_dir, "resources", "mock_credentials")
+)
 
 
 def create_statemachine(name, profile):
-
-    # point boto3 to our local credentials file
-    # using an env var.
-    os.environ["AWS_SHARED_CREDENTIALS_FILE"] = str(
-        Path(current_dir, "resources", "mock_credentials")
-    )
-
-    # read our dummy statemachine definition
-    with open(Path(current_dir, "resources", "sfn_definition.json")) as f:
-        sfn_definition = f.read()
-
     # some dummy role
     role = "arn:aws:iam::012345678901:role/service-role/AmazonSageMaker-ExecutionRole-20191008T190827"
 
-    client = boto3.Session(profile_name=profile).client("stepfunctions")
+    # reuse the clients stepview creates for a profile.
+    client, _, _ = stepview.data.get_clients(profile)
     state_machine = client.create_state_machine(
-        name=name, definition=sfn_definition, roleArn=role
+        name=name, definition=SFN_DEFINITION, roleArn=role
     )
 
     return client, role, state_machine
 
 
+def ago(**kwargs) -> datetime.datetime:
+    """Return the current utc time minus a timedelta of kwargs."""
+    return datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(
+        **kwargs
+    )
+
+
 def create_metric(
     metric_name, profile, state_machine, timestamp=NOW.subtract(minutes=1)
 ):
     """Add a metric to cloudwatch check how to add MetricData from the
     documentation https://boto3.amazonaws.com/v1/documentation/api/latest/refer
-    ence/services/cloudwatch.html#CloudWatch.Client.put_metric_data."""
+    ence/services/cloudwatch.html#CloudWatch.Client.put_metric_data.
 
-    # point boto3 to our local credentials file
-    # using an env var.
-    os.environ["AWS_SHARED_CREDENTIALS_FILE"] = str(
-        Path(current_dir, "resources", "mock_credentials")
+    By default we substract 1 minute so that we are sure we are before
+    the init of NOW in data module.
+    """
+    create_metrics(
+        [(metric_name, timestamp)], profile=profile, state_machine=state_machine
     )
 
-    client = boto3.Session(profile_name=profile).client("cloudwatch")
+
+def create_metrics(metrics, profile, state_machine):
+    """Add a list of (metric_name, timestamp) to cloudwatch in a single
+    put_metric_data call."""
+
+    _, client, _ = stepview.data.get_clients(profile)
     client.put_metric_data(
-        Namespace="AWS/State",
+        Namespace="AWS/States",
         MetricData=[
             {
                 "MetricName": metric_name,
@@ -109,294 +91,399 @@ def create_metric(
                     "Minimum": 1,
                     "Maximum": 1,
                 },
-                # we substract 1 minute so that we are sure we are
-                # before the init of NOW in data module.
                 "Timestamp": timestamp,
                 "Values": [1],
                 "Value": 1,
             }
+            for metric_name, timestamp in metrics
         ],
     )
 
 
 class TestStepView(unittest.TestCase):
-    @patch("stepview.data.get_statemachines_for_tags")
     @mock_cloudwatch
     @mock_stepfunctions
-    def test_get_stepfunctions_status_happy_flow(self, m_get_statemachines_for_tags):
+    def test_get_stepfunctions_status_happy_flow(self):
         client, role, state_machine = create_statemachine("sm1", "profile1")
         create_metric(
             MetricNames.EXECUTIONS_SUCCEEDED,
             profile="profile1",
             state_machine=state_machine,
         )
-        state_machine["ResourceARN"] = state_machine["stateMachineArn"]
-        m_get_statemachines_for_tags.return_value = [[state_machine]]
 
         self.exception_ = None
         try:
-            stepview.data.main(aws_profiles=["profile1"], period="day", tags=[])
+            stepview.data.main(
+                aws_profiles=["profile1"], period="day", tags=[], use_cache=False
+            )
         except Exception as e:
             self.exception_ = e
 
         self.assertIsNone(self.exception_)
 
-    @unittest.skip("first get performance straight before we continue tests.")
-    @freeze_time("2022-05-08 12:05:05")
-    @mock_cloudwatch
     @mock_stepfunctions
-    def test_stepview_on_time_period_minute(self):
-        stepview.data.NOW = pendulum.now()
-        sfn_client, role, state_machine = create_statemachine("sm1", "profile1")
-
-        time_started = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(seconds=40).to_iso8601_string()
-        )
-        time_succeeded = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(seconds=5).to_iso8601_string()
-        )
-        time_too_early = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(minutes=1, seconds=1).to_iso8601_string()
+    def test_get_statemachines_without_tags(self):
+        sfn_client, _, sm1 = create_statemachine("sm1", "profile1")
+        _, _, sm2 = create_statemachine("sm2", "profile1")
+        tags_client = MagicMock()
+
+        pages = list(
+            stepview.data.get_statemachines(
+                sfn_client=sfn_client, tags_client=tags_client, tags=[]
+            )
         )
 
-        create_metric(
-            MetricNames.EXECUTIONS_STARTED,
-            profile="profile1",
-            state_machine=state_machine,
-            timestamp=time_started,
-        )
-        create_metric(
-            MetricNames.EXECUTIONS_SUCCEEDED,
-            profile="profile1",
-            state_machine=state_machine,
-            timestamp=time_succeeded,
-        )
-        create_metric(
-            MetricNames.EXECUTIONS_STARTED,
-            profile="profile1",
-            state_machine=state_machine,
-            timestamp=time_too_early,
+        self.assertEqual(
+            [arn for page in pages for arn in page],
+            [sm1["stateMachineArn"], sm2["stateMachineArn"]],
         )
+        # untagged statemachines are not known by the tagging api.
+        tags_client.get_paginator.assert_not_called()
+
+    def test_batch_get_metric_data(self):
+        # enough statemachines to need more than 1 GetMetricData call.
+        state_machine_arns = [
+            f"arn:aws:states:eu-west-1:123456789012:stateMachine:sm{i}"
+            for i in range(100)
+        ]
 
-        _, result = stepview.data.main(aws_profiles=["profile1"], period="minute")
-
-        # self.assertEqual(result[0].state.running, 1)
-        self.assertEqual(result[0].state.succeeded, 1)
-        self.assertEqual(result[0].state.succeeded_perc, 100.0)
-        self.assertEqual(result[0].state.failed, 0)
-        self.assertEqual(result[0].state.throttled, 0)
-        self.assertEqual(result[0].state.timed_out, 0)
-        self.assertEqual(result[0].state.total_executions, 1)
-
-    @unittest.skip("first get performance straight before we continue tests.")
-    @mock_cloudwatch
-    @mock_stepfunctions
-    def test_stepview_on_time_period_hour(self):
+        def paginate(MetricDataQueries, **kwargs):
+            self.assertLessEqual(len(MetricDataQueries), MAX_METRIC_DATA_QUERIES)
+            yield {
+                "MetricDataResults": [
+                    {"Id": query["Id"], "Values": [1.0, 2.0]}
+                    for query in MetricDataQueries
+                ]
+            }
 
-        sfn_client, role, state_machine = create_statemachine("sm1", "profile1")
+        cloudwatch_client = MagicMock()
+        cloudwatch_client.get_paginator.return_value.paginate.side_effect = paginate
 
-        time_started = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(minutes=59).to_iso8601_string()
-        )
-        time_succeeded = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(seconds=5).to_iso8601_string()
-        )
-        time_too_early = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(hours=1, minutes=1, seconds=1).to_iso8601_string()
+        metrics = stepview.data.batch_get_metric_data(
+            cloudwatch_client=cloudwatch_client,
+            state_machine_arns=state_machine_arns,
+            period=stepview.data.get_period_objects(Time.DAY),
         )
 
-        create_metric(
-            MetricNames.EXECUTIONS_STARTED,
-            profile="profile1",
-            state_machine=state_machine,
-            timestamp=time_started,
+        self.assertEqual(
+            cloudwatch_client.get_paginator.return_value.paginate.call_count, 2
         )
-        create_metric(
-            MetricNames.EXECUTIONS_SUCCEEDED,
-            profile="profile1",
-            state_machine=state_machine,
-            timestamp=time_succeeded,
-        )
-        create_metric(
-            MetricNames.EXECUTIONS_STARTED,
-            profile="profile1",
-            state_machine=state_machine,
-            timestamp=time_too_early,
-        )
-
-        _, result = stepview.data.main(aws_profiles=["profile1"], period=Time.HOUR)
-
-        # self.assertEqual(result[0].state.running, 0)
-        self.assertEqual(result[0].state.succeeded, 1)
-        self.assertEqual(result[0].state.succeeded_perc, 100.0)
-        self.assertEqual(result[0].state.failed, 0)
-        self.assertEqual(result[0].state.throttled, 0)
-        self.assertEqual(result[0].state.timed_out, 0)
-        self.assertEqual(result[0].state.total_executions, 1)
+        self.assertEqual(list(metrics.keys()), state_machine_arns)
+        for metric in metrics.values():
+            self.assertEqual(metric, dict.fromkeys(METRICS, 3.0))
+
+    def test_batch_get_metric_data_cached(self):
+        state_machine_arns = ["arn:aws:states:eu-west-1:123456789012:stateMachine:sm1"]
+        cloudwatch_client = MagicMock()
+        cloudwatch_client.get_paginator.return_value.paginate.return_value = [
+            {
+                "MetricDataResults": [
+                    {"Id": f"m{i}", "Values": [1.0], "StatusCode": "Complete"}
+                    for i in range(len(METRICS))
+                ]
+            }
+        ]
 
-    @unittest.skip("first get performance straight before we continue tests.")
-    @mock_stepfunctions
-    @patch("stepview.data.list_executions_for_state_machine")
-    def test_stepview_on_time_period_today(self, m_list_executions):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = Cache(Path(cache_dir, "cache.sqlite"))
+            for _ in range(2):
+                metrics = stepview.data.batch_get_metric_data(
+                    cloudwatch_client=cloudwatch_client,
+                    state_machine_arns=state_machine_arns,
+                    period=stepview.data.get_period_objects(Time.DAY),
+                    cache=cache,
+                )
+                self.assertEqual(
+                    metrics[state_machine_arns[0]], dict.fromkeys(METRICS, 1.0)
+                )
+
+        # the second call is served from the cache.
+        self.assertEqual(
+            cloudwatch_client.get_paginator.return_value.paginate.call_count, 1
+        )
 
-        sfn_client, role, statemachine = create_statemachine("sm1", "profile1")
+    def test_batch_get_metric_data_partial_data_is_not_cached(self):
+        state_machine_arns = ["arn:aws:states:eu-west-1:123456789012:stateMachine:sm1"]
+        cloudwatch_client = MagicMock()
+        cloudwatch_client.get_paginator.return_value.paginate.return_value = [
+            {
+                "MetricDataResults": [
+                    {"Id": f"m{i}", "Values": [1.0], "StatusCode": "PartialData"}
+                    for i in range(len(METRICS))
+                ]
+            }
+        ]
 
-        # we substract the granularity of the PERIODS_MAPPING.
-        # for today the granularity is set to hour
-        # but in this case we set to seconds because only at midnight
-        # days=1 will be seen as part of today.
-        not_today = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(days=1, seconds=1).to_iso8601_string()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = Cache(Path(cache_dir, "cache.sqlite"))
+            for _ in range(2):
+                stepview.data.batch_get_metric_data(
+                    cloudwatch_client=cloudwatch_client,
+                    state_machine_arns=state_machine_arns,
+                    period=stepview.data.get_period_objects(Time.DAY),
+                    cache=cache,
+                )
+
+        self.assertEqual(
+            cloudwatch_client.get_paginator.return_value.paginate.call_count, 2
         )
-        m_list_executions.side_effect = [
+
+    def test_batch_get_metric_data_cache_errors(self):
+        state_machine_arns = ["arn:aws:states:eu-west-1:123456789012:stateMachine:sm1"]
+        cloudwatch_client = MagicMock()
+        cloudwatch_client.get_paginator.return_value.paginate.return_value = [
             {
-                "nextToken": "some-token",
-                **list_executions(["SUCCEEDED"]),
-            },
-            list_executions(["FAILED"], start_date=not_today),
+                "MetricDataResults": [
+                    {"Id": f"m{i}", "Values": [1.0], "StatusCode": "Complete"}
+                    for i in range(len(METRICS))
+                ]
+            }
         ]
-
-        states = stepview.data.get_all_states_of_executions(
-            sfn_client=sfn_client,
-            state_machine_arn=statemachine.get("stateMachineArn"),
-            period=stepview.data.TODAY,
+        cache = MagicMock()
+        cache.get_many.side_effect = sqlite3.OperationalError("database is locked")
+        cache.set_many.side_effect = sqlite3.OperationalError("disk is full")
+
+        metrics = stepview.data.batch_get_metric_data(
+            cloudwatch_client=cloudwatch_client,
+            state_machine_arns=state_machine_arns,
+            period=stepview.data.get_period_objects(Time.DAY),
+            cache=cache,
         )
 
-        self.assertEqual(states.succeeded, 1)
-        self.assertEqual(states.succeeded_perc, 100.0)
-        self.assertEqual(states.failed, 0)
+        self.assertEqual(metrics[state_machine_arns[0]], dict.fromkeys(METRICS, 1.0))
+        cache.set_many.assert_called_once()
+
+    def test_get_clients_are_reused(self):
+        clients = stepview.data.get_clients("profile1")
+        self.assertIs(clients, stepview.data.get_clients("profile1"))
+        self.assertIsNot(clients, stepview.data.get_clients("profile2"))
+
+    @patch("stepview.data.boto3.Session")
+    def test_get_clients_resolve_credentials_once(self, m_session):
+        # a profile that no other test uses, its clients stay cached.
+        for _ in range(2):
+            stepview.data.get_clients("profile_session")
+
+        m_session.assert_called_once_with(profile_name="profile_session")
+        m_session.return_value.get_credentials.assert_called_once_with()
+
+    def test_parse_aws_arn(self):
+        self.assertEqual(
+            stepview.data.parse_aws_arn(
+                "arn:aws:states:eu-west-1:123456789012:stateMachine:sm1"
+            ),
+            ("123456789012", "eu-west-1", "sm1"),
+        )
+        self.assertEqual(
+            stepview.data.parse_aws_arn("arn:aws:iam::123456789012:role/foo/bar"),
+            ("123456789012", "", "foo/bar"),
+        )
 
-    @unittest.skip("first get performance straight before we continue tests.")
+    @mock_cloudwatch
     @mock_stepfunctions
-    @patch("stepview.data.list_executions_for_state_machine")
-    def test_stepview_on_time_period_day(self, m_list_executions):
-
-        sfn_client, role, statemachine = create_statemachine("sm1", "profile1")
-
-        # we substract the granularity of the PERIODS_MAPPING.
-        # for day the granularity is set to hour.
-        yesterday = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(days=1, hours=1).to_iso8601_string()
+    def test_run_for_profile_cached(self):
+        sfn_client, _, state_machine = create_statemachine("sm1", "profile1")
+        _, cloudwatch_client, _ = stepview.data.get_clients("profile1")
+        period = stepview.data.get_period_objects(Time.DAY)
+
+        with tempfile.TemporaryDirectory() as cache_dir, patch.object(
+            cloudwatch_client, "get_paginator", wraps=cloudwatch_client.get_paginator
+        ) as m_get_paginator:
+            cache = Cache(Path(cache_dir, "cache.sqlite"))
+            running = []
+            for _ in range(2):
+                sfn_client.start_execution(
+                    stateMachineArn=state_machine["stateMachineArn"]
+                )
+                rows = stepview.data.run_for_profile(
+                    profile_name="profile1", period=period, tags=[], cache=cache
+                )
+                running.append(rows[0].state.running)
+
+        # the metrics of the second run come from the cache, the running
+        # executions are always fetched.
+        self.assertEqual(m_get_paginator.call_count, 1)
+        self.assertEqual(running, [1, 2])
+
+    @patch("stepview.data.run_for_profile")
+    def test_main_throttling(self, m_run_for_profile):
+        m_run_for_profile.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "ThrottlingException"}}, "GetMetricData"
         )
-        m_list_executions.side_effect = [
-            {
-                "nextToken": "some-token",
-                **list_executions(["SUCCEEDED"]),
-            },
-            list_executions(["FAILED"], start_date=yesterday),
-        ]
 
-        states = stepview.data.get_all_states_of_executions(
-            sfn_client=sfn_client,
-            state_machine_arn=statemachine.get("stateMachineArn"),
-            period=stepview.data.DAY,
+        with self.assertLogs(stepview.data.logger, "INFO") as logs:
+            _, rows = stepview.data.main(
+                aws_profiles=["profile1"], period=Time.DAY, tags=[], use_cache=False
+            )
+
+        self.assertEqual(rows, [])
+        self.assertIn("Throttling exception", logs.output[0])
+
+    def test_get_cache_is_optional(self):
+        with patch("stepview.data.Cache", side_effect=OSError("read-only")):
+            self.assertIsNone(stepview.data.get_cache())
+
+    def test_make_key_has_cache_version(self):
+        key = make_key("foo")
+        with patch("stepview.cache.CACHE_VERSION", -1):
+            self.assertNotEqual(key, make_key("foo"))
+
+    def test_row_get_values(self):
+        state = stepview.data.get_sfn_data(
+            metrics={
+                MetricNames.EXECUTIONS_STARTED: 3000,
+                MetricNames.EXECUTIONS_SUCCEEDED: 2000,
+                MetricNames.EXECUTIONS_FAILED: 1000,
+                MetricNames.EXECUTIONS_ABORTED: 0,
+                MetricNames.EXECUTIONS_TIMED_OUT: 0,
+                MetricNames.EXECUTION_THROTTLED: 0,
+            },
+            running=">=3",
+        )
+        row = stepview.data.Row(
+            state_machine_name="sm1",
+            state_machine_name_with_url="[link=foo]sm1[/link]",
+            profile_name="profile1",
+            account="123456789012",
+            region="eu-west-1",
+            state=state,
+        )
+        self.assertEqual(
+            row.get_values(),
+            (
+                "[link=foo]sm1[/link]",
+                "profile1",
+                "123456789012",
+                "eu-west-1",
+                "3,000",
+                "66.67",
+                ">=3",
+                "1,000/0/0/0",
+            ),
         )
 
-        self.assertEqual(states.succeeded, 1)
-        self.assertEqual(states.succeeded_perc, 100.0)
-        self.assertEqual(states.failed, 0)
+    def test_cache_expires(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = Cache(Path(cache_dir, "cache.sqlite"))
+            cache.set_many({"foo": 1, "bar": 2}, ttl=60)
+            cache.set_many({"baz": 3}, ttl=-1)
+            self.assertEqual(
+                cache.get_many(["foo", "bar", "baz", "qux"]), {"foo": 1, "bar": 2}
+            )
 
-    @unittest.skip("first get performance straight before we continue tests.")
+    @mock_cloudwatch
     @mock_stepfunctions
-    @patch("stepview.data.list_executions_for_state_machine")
-    def test_stepview_on_time_period_week(self, m_list_executions):
-
-        sfn_client, role, statemachine = create_statemachine("sm1", "profile1")
+    @mock_cloudwatch
+    @mock_stepfunctions
+    def test_run_for_profile_deleted_statemachine(self):
+        sfn_client, _, sm1 = create_statemachine("sm1", "profile1")
+        _, _, sm2 = create_statemachine("sm2", "profile1")
+        period = stepview.data.get_period_objects(Time.DAY)
 
-        # we substract the granularity of the PERIODS_MAPPING.
-        # for week the granularity is set to hour,
-        # therefore we need to go back 1 month and 1 day.
-        last_week = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(weeks=1, days=1).to_iso8601_string()
-        )
-        m_list_executions.side_effect = [
-            {
-                "nextToken": "some-token",
-                **list_executions(["SUCCEEDED"]),
-            },
-            list_executions(["FAILED"], start_date=last_week),
-        ]
+        # sm2 is deleted after we listed the statemachines, the run skips it
+        # instead of failing.
+        def get_statemachines(**kwargs):
+            state_machine_arns = [sm1["stateMachineArn"], sm2["stateMachineArn"]]
+            sfn_client.delete_state_machine(stateMachineArn=sm2["stateMachineArn"])
+            yield state_machine_arns
 
-        states = stepview.data.get_all_states_of_executions(
-            sfn_client=sfn_client,
-            state_machine_arn=statemachine.get("stateMachineArn"),
-            period=stepview.data.WEEK,
-        )
+        with patch("stepview.data.get_statemachines", get_statemachines):
+            rows = stepview.data.run_for_profile(
+                profile_name="profile1", period=period, tags=[]
+            )
 
-        self.assertEqual(states.succeeded, 1)
-        self.assertEqual(states.succeeded_perc, 100.0)
-        self.assertEqual(states.failed, 0)
+        self.assertEqual([row.state_machine_name for row in rows], ["sm1"])
 
-    @unittest.skip("first get performance straight before we continue tests.")
+    @freeze_time("2022-05-08 12:05:05")
+    @mock_cloudwatch
     @mock_stepfunctions
-    @patch("stepview.data.list_executions_for_state_machine")
-    def test_stepview_on_time_period_month(self, m_list_executions):
+    def test_stepview_on_time_period_minute(self):
+        sfn_client, role, state_machine = create_statemachine("sm1", "profile1")
 
-        sfn_client, role, statemachine = create_statemachine("sm1", "profile1")
+        # the period is aligned on the minute: 12:04:00 up to 12:05:00.
+        time_started = ago(seconds=40)
+        time_succeeded = ago(seconds=10)
+        time_too_early = ago(minutes=1, seconds=6)
+        time_too_late = ago(seconds=1)
 
-        # we substract the granularity of the PERIODS_MAPPING.
-        # for month the granularity is set to hour,
-        # therefore we need to go back 1 month and 1 day.
-        last_month = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(months=1, days=1).to_iso8601_string()
+        create_metrics(
+            [
+                (MetricNames.EXECUTIONS_STARTED, time_started),
+                (MetricNames.EXECUTIONS_SUCCEEDED, time_succeeded),
+                (MetricNames.EXECUTIONS_STARTED, time_too_early),
+                (MetricNames.EXECUTIONS_STARTED, time_too_late),
+            ],
+            profile="profile1",
+            state_machine=state_machine,
         )
-        m_list_executions.side_effect = [
-            {
-                "nextToken": "some-token",
-                **list_executions(["SUCCEEDED"]),
-            },
-            list_executions(["FAILED"], start_date=last_month),
-        ]
 
-        states = stepview.data.get_all_states_of_executions(
-            sfn_client=sfn_client,
-            state_machine_arn=statemachine.get("stateMachineArn"),
-            period=stepview.data.MONTH,
-        )
+        with patch.object(
+            stepview.data,
+            "PERIODS_MAPPING",
+            stepview.data.build_periods_mapping(pendulum.now()),
+        ):
+            _, result = stepview.data.main(
+                aws_profiles=["profile1"], period=Time.MINUTE, tags=[], use_cache=False
+            )
 
-        self.assertEqual(states.succeeded, 1)
-        self.assertEqual(states.succeeded_perc, 100.0)
-        self.assertEqual(states.failed, 0)
+        self.assertEqual(result[0].state.succeeded, 1)
+        self.assertEqual(result[0].state.succeeded_perc, 100.0)
+        self.assertEqual(result[0].state.failed, 0)
+        self.assertEqual(result[0].state.throttled, 0)
+        self.assertEqual(result[0].state.timed_out, 0)
+        self.assertEqual(result[0].state.total_executions, 1)
 
-    @unittest.skip("first get performance straight before we continue tests.")
+    @freeze_time("2022-05-08 12:05:05")
+    @mock_cloudwatch
     @mock_stepfunctions
-    @patch("stepview.data.list_executions_for_state_machine")
-    def test_stepview_on_time_period_year(self, m_list_executions):
+    def test_stepview_on_time_period_hour(self):
+        sfn_client, role, state_machine = create_statemachine("sm1", "profile1")
 
-        sfn_client, role, statemachine = create_statemachine("sm1", "profile1")
+        # the period is aligned on the minute: 11:05:00 up to 12:05:00.
+        time_started = ago(minutes=59)
+        time_succeeded = ago(seconds=10)
+        time_too_early = ago(hours=1, seconds=6)
+        time_too_late = ago(seconds=1)
 
-        # we substract the granularity of the PERIODS_MAPPING.
-        # for year the granularity is set to hour,
-        # therefore we need to go back 1 year and 1 day.
-        last_year = datetime.datetime.fromisoformat(
-            pendulum.now().subtract(years=1, days=1).to_iso8601_string()
+        create_metrics(
+            [
+                (MetricNames.EXECUTIONS_STARTED, time_started),
+                (MetricNames.EXECUTIONS_SUCCEEDED, time_succeeded),
+                (MetricNames.EXECUTIONS_STARTED, time_too_early),
+                (MetricNames.EXECUTIONS_STARTED, time_too_late),
+            ],
+            profile="profile1",
+            state_machine=state_machine,
         )
-        m_list_executions.side_effect = [
-            {
-                "nextToken": "some-token",
-                **list_executions(["SUCCEEDED"]),
-            },
-            list_executions(["FAILED"], start_date=last_year),
-        ]
 
-        states = stepview.data.get_all_states_of_executions(
-            sfn_client=sfn_client,
-            state_machine_arn=statemachine.get("stateMachineArn"),
-            period=stepview.data.YEAR,
-        )
+        with patch.object(
+            stepview.data,
+            "PERIODS_MAPPING",
+            stepview.data.build_periods_mapping(pendulum.now()),
+        ):
+            _, result = stepview.data.main(
+                aws_profiles=["profile1"], period=Time.HOUR, tags=[], use_cache=False
+            )
 
-        self.assertEqual(states.succeeded, 1)
-        self.assertEqual(states.succeeded_perc, 100.0)
-        self.assertEqual(states.failed, 0)
+        self.assertEqual(result[0].state.succeeded, 1)
+        self.assertEqual(result[0].state.succeeded_perc, 100.0)
+        self.assertEqual(result[0].state.failed, 0)
+        self.assertEqual(result[0].state.throttled, 0)
+        self.assertEqual(result[0].state.timed_out, 0)
+        self.assertEqual(result[0].state.total_executions, 1)
 
 
 class TestStepViewCli(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
         cls.runner = CliRunner()
+        # check that --help works, this also takes the one-time cost of the
+        # first invoke out of the tests below.
+        result = cls.runner.invoke(stepview.entrypoint.app, ["--help"])
+        assert result.exit_code == 0, result.output
 
     @patch("stepview.entrypoint.main")
-    @patch.object(App, "run")
+    @patch("textual.app.App.run")
     def test_cli(self, m_textual_run, m_main):
         m_main.return_value = ("foo", "bar")
         # for some reason i cannot call the run function when instantiating
@@ -407,7 +494,7 @@ class TestStepViewCli(unittest.TestCase):
         self.assertEqual(0, result.exit_code)
 
     @patch("stepview.entrypoint.main")
-    @patch.object(App, "run")
+    @patch("textual.app.App.run")
     def test_cli_tags(self, m_textual_run, m_main):
         m_main.return_value = ("foo", "bar")
         # for some reason i cannot call the run function when instantiating